@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import string
+import tempfile
+import platform
+import subprocess
+from argparse import ArgumentParser
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+from identifier import HashID, prototypes
+
+proj_dir = os.path.dirname(os.path.abspath(__file__))
+printable = [c for c in string.printable if c not in "\r\n\t\x0b\x0c"]
+categories = {
+    sre_constants.CATEGORY_DIGIT: string.digits,
+    sre_constants.CATEGORY_WORD: string.ascii_letters + string.digits + "_",
+    sre_constants.CATEGORY_SPACE: " ",
+}
+
+# Hashes cracked end to end, with the mode the fake hashcat cracks them in
+crackTargets = {
+    'md5': ('5f4dcc3b5aa765d61d8327deb882cf99', 0),
+    'ntlm': ('8846F7EAEE8FB117AD06BDD830B7586C', 1000),
+    'sha1': ('5baa61e4c9b93f3f0682250b6cf8331b7ee68fd8', 100),
+    'sha512crypt': ('$6$saltsalt$qFmFH.bQmmtXzyBY0s9v7Oicd2z4XSIecDzlB5KiA2/jctKu9YterLp8wwnSq.qc.eoxqOmSuNp2xS0ktL3nh/', 1800),
+}
+
+# hashcat test double: writes hash:password to the outfile when run with
+# the mode in FAKE_HASHCAT_MODE and empties the hash file like --remove
+fakeHashcat = """#!/usr/bin/env python3
+import os, sys
+args = sys.argv[1:]
+if "--restore" in args or "-m" not in args:
+    sys.exit(0)
+with open(os.environ["FAKE_HASHCAT_LOG"], "a") as log:
+    log.write(" ".join(args) + "\\n")
+if args[args.index("-m") + 1] != os.environ["FAKE_HASHCAT_MODE"]:
+    sys.exit(1)
+valued = ("-a", "-m", "-r", "-o", "--session", "--restore-file-path")
+positional = [arg for i, arg in enumerate(args) if not arg.startswith("-") and args[i - 1] not in valued]
+hashfile, outfile = positional[0], args[args.index("-o") + 1]
+with open(hashfile) as handle:
+    hashes = [line.strip() for line in handle if line.strip()]
+with open(outfile, "a") as handle:
+    for phash in hashes:
+        if "--username" in args:
+            phash = phash.split(":", 1)[1]
+        handle.write(phash + ":password\\n")
+open(hashfile, "w").close()
+"""
+
+
+def charset(items):
+    chars = set()
+    negate = False
+    for op, value in items:
+        if op == sre_constants.NEGATE:
+            negate = True
+        elif op == sre_constants.LITERAL:
+            chars.add(chr(value))
+        elif op == sre_constants.RANGE:
+            chars.update(chr(c) for c in range(value[0], value[1] + 1))
+        elif op == sre_constants.CATEGORY:
+            chars.update(categories.get(value, ""))
+    if negate:
+        return [c for c in printable if c not in chars]
+    return sorted(chars)
+
+
+def sample(parsed, rng):
+    # Random string from a parsed regex, covering what identifier.py uses
+    out = []
+    for op, value in parsed:
+        if op == sre_constants.LITERAL:
+            out.append(chr(value))
+        elif op == sre_constants.NOT_LITERAL:
+            out.append(rng.choice([c for c in printable if c != chr(value)]))
+        elif op == sre_constants.ANY:
+            out.append(rng.choice(printable))
+        elif op == sre_constants.IN:
+            out.append(rng.choice(charset(value)))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            low, high, sub = value
+            high = min(high, low + 8)
+            for _ in range(rng.randint(low, high)):
+                out.append(sample(sub, rng))
+        elif op == sre_constants.SUBPATTERN:
+            out.append(sample(value[-1], rng))
+        elif op == sre_constants.BRANCH:
+            out.append(sample(rng.choice(value[1]), rng))
+    return "".join(out)
+
+
+def corpus(perPrototype=20, seed=1):
+    """
+    Synthetic hashes for every prototype in identifier.py. Samples that do
+    not match their own prototype (lookarounds, back references) are
+    dropped, the second value counts the prototypes left uncovered.
+    """
+    rng = random.Random(seed)
+    hashes = []
+    uncovered = 0
+    for prototype in prototypes:
+        parsed = sre_parse.parse(prototype.regex.pattern, prototype.regex.flags)
+        found = 0
+        for _ in range(perPrototype * 5):
+            phash = sample(parsed, rng)
+            if prototype.regex.match(phash) and phash == phash.strip():
+                hashes.append(phash)
+                found += 1
+                if found == perPrototype:
+                    break
+        if found == 0:
+            uncovered += 1
+    return hashes, uncovered
+
+
+def benchIdentify(hashes, repeat=3):
+    hashid = HashID()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for phash in hashes:
+            hashid.identifyHash(phash, shouldPrint=False)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(hashes) / best
+
+
+def benchStartup(repeat=5):
+    results = {}
+    commands = {
+        'startup.import_ms': [sys.executable, "-c", "import identifier"],
+        'startup.identify_cli_ms': [sys.executable, "identifier.py", "-s", crackTargets['md5'][0]],
+    }
+    for name, command in commands.items():
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=proj_dir, stdout=subprocess.DEVNULL, check=True)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = best * 1000
+    return results
+
+
+def benchCrack(repeat=3):
+    """
+    Runs cracker.py against a fake hashcat on PATH, from start to the
+    printed crack. Also reports how many modes were tried first, which is
+    what the identifier ranking is meant to keep low.
+    """
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="cracker-bench-")
+    try:
+        bindir = os.path.join(workdir, "bin")
+        os.makedirs(bindir)
+        stub = os.path.join(bindir, "hashcat")
+        with open(stub, "w+") as handle:
+            handle.write(fakeHashcat)
+        os.chmod(stub, 0o755)
+        # cracker.py keeps its state next to itself, so it runs from a copy
+        for name in os.listdir(proj_dir):
+            if name.endswith(".py") or name == "myrule.rule":
+                shutil.copy(os.path.join(proj_dir, name), workdir)
+        with open(os.path.join(workdir, "wordlist.txt"), "w+") as handle:
+            handle.write("password\n")
+
+        log = os.path.join(workdir, "hashcat.log")
+        env = dict(os.environ, PATH=bindir + os.pathsep + os.environ.get("PATH", ""), FAKE_HASHCAT_LOG=log)
+        for name, (phash, mode) in crackTargets.items():
+            env["FAKE_HASHCAT_MODE"] = str(mode)
+            best = None
+            for _ in range(repeat):
+                # every run starts from the same state: no previous log, crack
+                # history, recovered plains or head list built from them
+                for leftover in ("hashcat.log", "mode_stats.json", "recovered.txt"):
+                    if os.path.exists(os.path.join(workdir, leftover)):
+                        os.remove(os.path.join(workdir, leftover))
+                shutil.rmtree(os.path.join(workdir, "cache"), ignore_errors=True)
+                start = time.perf_counter()
+                proc = subprocess.run([sys.executable, "cracker.py", phash], cwd=workdir, env=env,
+                                      input="n\n" + "y\n" * 100, capture_output=True, text=True)
+                elapsed = time.perf_counter() - start
+                if proc.returncode != 0 or "password" not in proc.stdout:
+                    print(f"[!] {name}: cracker.py failed\n{proc.stderr.strip()}", file=sys.stderr)
+                    break
+                best = elapsed if best is None else min(best, elapsed)
+            if best is None:
+                continue
+            with open(log, "r") as handle:
+                results[f'crack.{name}.stages'] = len(handle.readlines())
+            results[f'crack.{name}.ms'] = best * 1000
+    finally:
+        shutil.rmtree(workdir)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # Throughput regresses when it drops, everything else when it grows
+    regressions = []
+    for name, value in sorted(results.items()):
+        # corpus figures describe the run rather than measure it
+        if name.startswith("corpus.") or name not in baseline or not baseline[name]:
+            print(f"{name:32} {value:14.2f}")
+            continue
+        old = baseline[name]
+        change = (value - old) / old
+        worse = -change if name.endswith("per_sec") else change
+        flag = "  REGRESSION" if worse > tolerance else ""
+        print(f"{name:32} {value:14.2f} {old:14.2f} {change:+8.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+if __name__=="__main__":
+    parser = ArgumentParser(description="Benchmark hash identification and cracking latency")
+    parser.add_argument("-o", "--output", help="write results as json to this file")
+    parser.add_argument("-b", "--baseline", help="json results to compare against")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.2, help="allowed slowdown before failing (0.2 = 20%%)")
+    parser.add_argument("-n", "--per-prototype", type=int, default=20, help="synthetic hashes per prototype")
+    parser.add_argument("--skip-crack", action="store_true", help="skip the end to end runs")
+    args=parser.parse_args()
+
+    hashes, uncovered = corpus(args.per_prototype)
+    results = {
+        'corpus.hashes': len(hashes),
+        'corpus.uncovered_prototypes': uncovered,
+        'identify.hashes_per_sec': benchIdentify(hashes),
+    }
+    results.update(benchStartup())
+    if not args.skip_crack:
+        results.update(benchCrack())
+
+    report = {'python': platform.python_version(), 'platform': platform.platform(), 'results': results}
+    if args.output:
+        with open(args.output, "w+") as handle:
+            json.dump(report, handle, indent=1)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r") as handle:
+            baseline = json.load(handle)['results']
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} metrics regressed beyond {args.tolerance:.0%}")
+        sys.exit(1)
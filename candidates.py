@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+import os
+from wordlists import openWordlist
+
+
+def descrypt(word):
+    # DEScrypt keys are built from the first 8 characters only
+    yield word[:8]
+
+
+def lm(word):
+    # LM upper cases the password, cuts it at 14 characters and hashes the
+    # two 7 character halves on their own, hashcat cracks the halves.
+    # Longer passwords get no LM hash at all.
+    if len(word) > 14:
+        return
+    word = word.upper()
+    yield word[:7]
+    if len(word) > 7:
+        yield word[7:]
+
+
+# hashcat mode => what the algorithm actually consumes from a candidate
+reducers = {
+    1500: descrypt,
+    3000: lm,
+}
+
+
+def mapCandidates(words, mode):
+    # Maps candidates onto what mode consumes, repeats included
+    reduce = reducers[mode]
+    for word in words:
+        yield from reduce(word)
+
+
+def reduceCandidates(words, mode, capacity=2000000, errorRate=1e-7):
+    """
+    Maps candidates onto what mode consumes and drops repeats, keeping the
+    first occurrence so the wordlist order is preserved. Repeats are found
+    with a rotating Bloom filter of fixed size, so a repeat further back
+    than its window is kept (costing a hash, not a candidate) and about
+    errorRate of the new candidates are dropped.
+    """
+    # dedupe.py builds on this module, so it is imported when needed
+    from dedupe import RotatingBloomFilter
+    bloom = RotatingBloomFilter(capacity, errorRate)
+    for candidate in mapCandidates(words, mode):
+        if not bloom.seen(candidate):
+            yield candidate
+
+
+def reduceWordlist(wordlist, mode, cacheDir):
+    """
+    Returns a wordlist holding only the distinct candidates mode can tell
+    apart, built once per wordlist and mode under cacheDir. Modes without a
+    reducer get the wordlist back unchanged.
+    """
+    if mode not in reducers:
+        return wordlist
+    os.makedirs(cacheDir, exist_ok=True)
+    name = os.path.basename(wordlist)
+    for suffix in (".gz", ".xz", ".zst"):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    cached = os.path.join(cacheDir, f"{name}.{mode}.txt")
+    if os.path.exists(cached) and os.stat(cached).st_mtime >= os.stat(wordlist).st_mtime:
+        return cached
+
+    tmp = cached + ".tmp"
+    with openWordlist(wordlist) as source, open(tmp, "wb") as handle:
+        words = (line.rstrip(b"\r\n") for line in source)
+        for candidate in reduceCandidates(words, mode):
+            handle.write(candidate + b"\n")
+    # a half written cache must never be mistaken for a finished one
+    os.replace(tmp, cached)
+    return cached
+
+
+if __name__=="__main__":
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description="Reduce a wordlist to what a hashcat mode consumes")
+    parser.add_argument("wordlist")
+    parser.add_argument("-m", "--mode", type=int, required=True, choices=sorted(reducers))
+    parser.add_argument("-d", "--cache-dir", default="cache")
+    args=parser.parse_args()
+    print(reduceWordlist(args.wordlist, args.mode, args.cache_dir))
@@ -3,8 +3,16 @@ import os
 import sys
 import requests
 import subprocess
-from shutil import which
-from identifier import HashID
+from shutil import which, copyfile
+from argparse import ArgumentParser
+from identifier import HashID, loadHistory, saveHistory
+from watcher import OutfileWatcher
+from dumps import readDump, batchByMode, hashColons, formats
+from candidates import reduceWordlist
+from session import Session
+from wordlists import findWordlist, feedCommand
+from reorder import Reorderer
+from dedupe import dedupeCommand, readStats, worthDeduping
 
 if not which("hashcat"):
     shouldInstall = input("Hashcat not installed, install via pip? ")
@@ -19,63 +27,228 @@ except:
     subprocess.check_call([sys.executable, "-m", "pip", "install", "tqdm"])
     from tqdm import *
 
-def main(tocrack, proj_dir):
-    tocrack = sys.argv[1]
-    proj_dir = sys.path[0]
+def ask(question):
+    answer = input(question)
+    return True if len(answer)==0 or answer.lower()[0]=='y' else False
+
+def main(tocrack, proj_dir, dump_format=None, session_name=None, frequency=None, dedupe_choice=False, max_modes=5):
     hashfile = os.path.join(proj_dir,"hash.txt")
     crackedfile = os.path.join(proj_dir,"cracked_hashes.txt")
-    wordlist = os.path.join(proj_dir,"wordlist.txt")
+    wordlist = findWordlist(proj_dir)
     rule = os.path.join(proj_dir,"myrule.rule")
+    historyfile = os.path.join(proj_dir,"mode_stats.json")
+    batchdir = os.path.join(proj_dir,"batches")
+    cachedir = os.path.join(proj_dir,"cache")
+    statsfile = os.path.join(cachedir,"dedupe.json")
+
+    history = loadHistory(historyfile)
+    hashid = HashID(history=history)
+    reorderer = Reorderer(proj_dir, frequency)
 
-    with open(hashfile, "w+") as handle:
-        handle.write(tocrack)
+    # A named session keeps its plan, hash files and results under
+    # sessions/<name>/ and picks up where it stopped when run again.
+    session = Session(session_name, os.path.join(proj_dir,"sessions")) if session_name else None
+    if session:
+        hashfile, crackedfile, batchdir = session.hashfile, session.crackedfile, session.batchdir
+        statsfile = session.statsfile
 
-    hashid = HashID()
-    modes = hashid.identifyHash(tocrack)
+    if session and session.exists():
+        plan = session.load()
+        tocrack, dump_format, rules_choice = plan['target'], plan['format'], plan['rules']
+        print(f"Resuming session {session.name} ({len(session.pending())} stages left)")
+        if os.path.exists(crackedfile):
+            with open(crackedfile, "r") as handle:
+                print(f"Cracked so far:\n{handle.read()}")
+        bulk = os.path.isfile(tocrack)
+    else:
+        if tocrack is None:
+            print(f"Session {session_name} does not exist, give a hash or dump file to start it")
+            sys.exit(1)
+
+        # A file on argv is a credential dump: every hash in it is identified
+        # and written to one hash file per candidate mode.
+        bulk = os.path.isfile(tocrack)
+        if bulk:
+            tocrack = os.path.abspath(tocrack)
+            print(f"Reading hashes from {tocrack}")
+            # each hash only goes into the batches of its best ranked modes
+            batches = batchByMode(readDump(tocrack, dump_format), hashid, batchdir, limit=max_modes or None)
+            if len(batches) == 0:
+                print("[+] No crackable hashes found")
+            for hashmode, mode, batchfile, count in batches:
+                print(f"[+] {count} hashes for {mode} [Hashcat Mode: {hashmode}]")
+        else:
+            if session:
+                os.makedirs(session.dir, exist_ok=True)
+            with open(hashfile, "w+") as handle:
+                handle.write(tocrack)
+            modes = hashid.identifyHash(tocrack)
+            batches = [(hashmode, mode, hashfile, 1) for mode, hashmode in modes.items()]
 
-    use_rules = input("Use rules? ")
-    rules_choice = True if len(use_rules)==0 or use_rules.lower()[0]=='y' else False
+        rules_choice = ask("Use rules? ")
+        if session:
+            session.create(tocrack, dump_format, rules_choice, batches)
 
     # a => hash mode
-    # b => rule set
+    # b => rule set, None for a straight attack
     # c => hash file
-    # d => wordlist
+    # d => wordlists in the order they are tried, none to read from stdin
     # e => outfile
-    if rules_choice:
-        getcommand = lambda a, b, c, d, e: f'hashcat -a 0 -m {a} -r {b} --remove --potfile-disable "{c}" "{d}" -o "{e}"'
+    # f => extra flags
+    getcommand = lambda a, b, c, d, e, f="": (f'hashcat -a 0 -m {a}'
+                                              + (f' -r "{b}"' if b else '')
+                                              + f' --remove --potfile-disable {f}"{c}"'
+                                              + ''.join(f' "{w}"' for w in d) + f' -o "{e}"')
+
+    def onCrack(phash, plain):
+        reorderer.add(plain)
+        print("\n==================================")
+        print(f'{phash}:\033[31m{plain}\033[0m')
+        print("==================================")
+
+    if session:
+        stages = session.pending()
     else:
-        getcommand = lambda a, c, d, e: f'hashcat -a 0 -m {a} --remove --potfile-disable "{c}" "{d}" -o "{e}"'
+        stages = [{'mode': hashmode, 'name': mode, 'hashfile': batchfile, 'count': count, 'state': 'pending'}
+                  for hashmode, mode, batchfile, count in batches]
+
+    for stage in stages:
+        hashmode, mode = stage['mode'], stage['name']
+        command = session.restoreCommand(stage) if session else None
+        if command:
+            deduping = stage.get('dedupe', False)
+            if stage.get('feed'):
+                print(f"Restoring {mode}, skipping the first {stage['skip']} candidates it already tried")
+            else:
+                print(f"Restoring {mode} from its last checkpoint")
+        else:
+            deduping = dedupe_choice and worthDeduping(hashmode)
+            question = f"Try to break {stage['count']} hashes with {mode}? " if bulk else f"Try to break hash with {mode}? "
+            if not ask(question):
+                if session:
+                    session.mark(stage, 'skipped')
+                continue
+
+            # Truncating modes see far fewer distinct candidates than the
+            # wordlist holds. Rules would act on the full words, so the reduced
+            # list only stands in for a straight attack.
+            modewordlist = wordlist if rules_choice else reduceWordlist(wordlist, hashmode, cachedir)
 
-    if len(modes) > 0:
-        for index,mode in enumerate(modes):
-            shouldProceed = input(f"Try to break hash with {mode}? ")
-            shouldProceed = True if len(shouldProceed)==0 or shouldProceed.lower()[0]=='y' else False
-            if shouldProceed:
+            # Passwords cracked before, including earlier in this run, are
+            # tried ahead of the wordlist.
+            head = reorderer.head()
+            if head and not rules_choice:
+                head = reduceWordlist(head, hashmode, cachedir)
+            if head and session:
+                head = copyfile(head, session.headfile(stage))
+            heads = [head] if head else []
 
+            flags = "--username " if bulk else ""
+            if session:
+                flags += session.sessionFlags(stage)
+                # a checkpoint left by an earlier run of the stage is stale
+                if os.path.exists(session.restorefile(stage)):
+                    os.remove(session.restorefile(stage))
+
+            # Compressed wordlists are decompressed by a separate process
+            # and piped into hashcat, never unpacked to disk.
+            wordlists = heads + [modewordlist]
+            feed = feedCommand(modewordlist)
+            if feed and heads:
+                feed = f'(cat "{heads[0]}"; {feed})'
+
+            # Deduplication puts the rule output through dedupe.py and the
+            # cracking hashcat reads what is left from stdin.
+            if dedupe_choice and not deduping:
+                print(f"[+] Not deduplicating for {mode}, hashcat hashes it faster than dedupe.py can filter")
+            if deduping:
                 if rules_choice:
-                    os.system(getcommand(list(modes.values())[index], rule, hashfile, wordlist, crackedfile))
-                else:
-                    os.system(getcommand(list(modes.values())[index], hashfile, wordlist, crackedfile))
-
-                if os.stat("hash.txt").st_size != 0:
-                    print(f"Could not break hash using {mode}") 
-                else:
-                    print("\nCongratulations hash was cracked!\n")
-                    print("==================================")
-                    with open("cracked_hashes.txt","r") as handle:
-                        result = handle.readline().split(":")
-                        print(f'{result[0]}:\033[31m{result[1]}\033[0m', end='')
-                    print("==================================")
-                    os.remove("cracked_hashes.txt")
-                    break
+                    generator = f'hashcat --stdout -r "{rule}"' + ''.join(f' "{w}"' for w in ([] if feed else wordlists))
+                    feed = f"{feed} | {generator}" if feed else generator
+                elif not feed:
+                    feed = "cat" + ''.join(f' "{w}"' for w in wordlists)
+                feed += " | " + dedupeCommand(hashmode, statsfile)
+
+            if feed:
+                # kept so an interrupted session can feed the stage again
+                rules = rule if rules_choice and not deduping else None
+                stage.update(feed=feed, dedupe=deduping, skip=0,
+                             command=getcommand(hashmode, rules, stage['hashfile'], [], crackedfile, flags))
+                command = f"{feed} | {stage['command']}"
+            else:
+                command = getcommand(hashmode, rule if rules_choice else None, stage['hashfile'], wordlists, crackedfile, flags)
+
+        if session:
+            session.mark(stage, 'running')
+        if deduping and os.path.exists(statsfile):
+            os.remove(statsfile)
+
+        # hashcat --remove rewrites the hash file while it runs, so cracks
+        # are taken from the outfile as they land instead
+        # salted hashes hold ':' too, the plain starts after as many of them
+        colons = hashColons(stage['hashfile']) if bulk else tocrack.strip().count(":")
+        with OutfileWatcher(crackedfile, onCrack, colons=colons) as watcher:
+            status = os.waitstatus_to_exitcode(os.system(command))
+
+        stats = readStats(statsfile) if deduping else None
+        if stats:
+            print(f"[+] {stats['fraction']:.1%} of {stats['total']} candidates were duplicates and skipped")
+
+        if watcher.cracked:
+            # cracked modes get tried earlier next time
+            history[hashmode] = history.get(hashmode, 0) + len(watcher.cracked)
+            saveHistory(historyfile, history)
+
+        # hashcat exit status: 0 cracked, 1 exhausted, 2 aborted, 3 aborted
+        # at a checkpoint, 4 runtime limit, 255 (-1) error. A negative
+        # status means hashcat was killed by a signal.
+        if status in (2, 3, 4) or status < 0:
+            # left running, so the session restores it from the checkpoint
+            print(f"\nhashcat was stopped while trying {mode}")
+            if session:
+                print(f"Run cracker.py --session {session.name} to continue")
+            break
+        if status not in (0, 1):
+            print(f"hashcat failed with exit status {status} while trying {mode}")
+            if session:
+                session.mark(stage, 'pending')
+            continue
+        # hashcat writes LM halves to the outfile as each one cracks, so only
+        # an emptied hash file (--remove) means everything was cracked
+        if status == 1 and os.path.getsize(stage['hashfile']) != 0:
+            if bulk or not watcher.cracked:
+                print(f"Could not break hash using {mode}") 
+            else:
+                print(f"Only part of the hash was cracked using {mode}")
+            if session:
+                session.mark(stage, 'done')
+            continue
+
+        if session:
+            session.mark(stage, 'cracked')
+        if not bulk:
+            print("\nCongratulations hash was cracked!\n")
+            if session:
+                for stage in session.pending():
+                    session.mark(stage, 'skipped')
+            else:
+                os.remove(crackedfile)
+            break
 
 if __name__ == '__main__':
-    if len(sys.argv)==1:
-        print(('Usage:'
-        'python3 cracker.py hash'))
-        sys.exit(0)
+    parser = ArgumentParser(description="Identify and crack hashes with hashcat")
+    parser.add_argument("hash", nargs="?", help="hash to crack, or a credential dump file")
+    parser.add_argument("-f", "--format", choices=sorted(formats), help="dump format, guessed when omitted")
+    parser.add_argument("-n", "--max-modes", type=int, default=5,
+                        help="modes to try per hash of a dump file, best ranked first (default 5, 0 for all)")
+    parser.add_argument("-s", "--session", help="name of a session to start or resume")
+    parser.add_argument("--frequency", help="password frequency list, its top entries are tried first")
+    parser.add_argument("--dedupe", action="store_true", help="drop repeated candidates from the rule output before hashing")
+    args=parser.parse_args()
+    if args.hash is None and args.session is None:
+        parser.error("a hash, a dump file or --session is required")
 
-    if not os.path.exists("wordlist.txt"):
+    if findWordlist(sys.path[0]) is None:
         wordlistChoice = input("Wordlist does not exist, download (280MB) and install automatically? ")
         wordlistChoice = True if len(wordlistChoice)==0 or wordlistChoice.lower()[0]=='y' else False
         if wordlistChoice:
@@ -83,7 +256,8 @@ if __name__ == '__main__':
             print(f"Downloading wordlist from {url} :")
             with requests.get(url ,stream=True) as r:
                 total = 280000000
-                with open("wordlist.txt","wb+") as wordlist:
+                # kept compressed, the cracker decompresses it on the fly
+                with open(os.path.join(sys.path[0],"wordlist.txt.gz"),"wb+") as wordlist:
                    progress = tqdm(total=total) 
                    for chunk in r.iter_content(chunk_size=1024*8):
                        wordlist.write(chunk)
@@ -93,6 +267,6 @@ if __name__ == '__main__':
             print("\nWordlist downloaded!")
         else:
             print(("In that case go ahead and download a wordlist yourself and place it"
-                  "in the same directory as cracker.py with the name wordlist.txt!"))
+                  "in the same directory as cracker.py with the name wordlist.txt (or .txt.gz, .txt.xz, .txt.zst)!"))
             sys.exit(0)
-    main(sys.argv[1], sys.path[0])
+    main(args.hash, sys.path[0], args.format, args.session, args.frequency, args.dedupe, args.max_modes)
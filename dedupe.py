@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import math
+
+from candidates import reducers, mapCandidates
+
+
+# Modes slow enough that hashcat on a single GPU tries fewer candidates
+# per second than dedupe.py filters (~100k/s), so every duplicate dropped
+# saves real time. Anything faster, which includes the iterated crypt
+# formats (md5crypt, sha512crypt ...) and the truncating DEScrypt and LM,
+# would be held back by the filter instead.
+slowModes = {
+    3200,  # bcrypt
+    8200,  # 1Password cloud keychain, 100000 rounds of PBKDF2-SHA512
+    8900,  # scrypt
+    9300,  # Cisco-IOS $9$ (scrypt)
+}
+
+
+def worthDeduping(mode):
+    return mode in slowModes
+
+
+class BloomFilter(object):
+
+    def __init__(self, capacity, errorRate):
+        super(BloomFilter, self).__init__()
+        self.bits = max(8, int(-capacity * math.log(errorRate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def indexes(self, item):
+        # Kirsch-Mitzenmacher: k indexes out of the two halves of one 64
+        # bit hash. hash() is salted per process unless PYTHONHASHSEED is
+        # set, which dedupeCommand does.
+        h1 = hash(item) & 0xffffffffffffffff
+        h2 = (h1 >> 32) | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def contains(self, indexes):
+        array = self.array
+        return all(array[i >> 3] & (1 << (i & 7)) for i in indexes)
+
+    def add(self, indexes):
+        array = self.array
+        for i in indexes:
+            array[i >> 3] |= 1 << (i & 7)
+        self.count += 1
+
+
+class RotatingBloomFilter(object):
+    """
+    Two Bloom filter generations of capacity items each. Once the current
+    one is full it becomes the previous one and the oldest is dropped, so
+    memory stays fixed and repeats are caught within the last capacity to
+    2 * capacity distinct candidates. The repeats rules produce come from
+    the same base word, so they tend to land well inside that window.
+    """
+
+    def __init__(self, capacity=2000000, errorRate=1e-4):
+        super(RotatingBloomFilter, self).__init__()
+        self.capacity = capacity
+        self.errorRate = errorRate
+        self.current = BloomFilter(capacity, errorRate)
+        self.previous = None
+
+    def seen(self, item):
+        # True if item was probably seen before, records it otherwise.
+        # Both generations have the same size, so the indexes are shared.
+        indexes = self.current.indexes(item)
+        if self.current.contains(indexes):
+            return True
+        if self.previous is not None and self.previous.contains(indexes):
+            return True
+        if self.current.count >= self.capacity:
+            self.previous = self.current
+            self.current = BloomFilter(self.capacity, self.errorRate)
+        self.current.add(indexes)
+        return False
+
+
+def dedupe(candidates, bloom, stats):
+    # stats gets the number of candidates read and removed
+    for candidate in candidates:
+        stats['total'] += 1
+        if bloom.seen(candidate):
+            stats['removed'] += 1
+            continue
+        yield candidate
+
+
+def dedupeCommand(mode=None, statsfile=None, capacity=None):
+    # shell command of this module as a pipeline stage. A fixed hash seed
+    # makes the same input give the same output, so a restored session can
+    # skip what hashcat already tried.
+    command = f'PYTHONHASHSEED=0 "{sys.executable}" "{os.path.abspath(__file__)}"'
+    if mode in reducers:
+        command += f' -m {mode}'
+    if statsfile:
+        command += f' --stats "{statsfile}"'
+    if capacity:
+        command += f' --capacity {capacity}'
+    return command
+
+
+def readStats(statsfile):
+    try:
+        with open(statsfile, "r") as handle:
+            return json.load(handle)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+if __name__=="__main__":
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description="Drop repeated candidates from a stream, e.g. hashcat --stdout -r")
+    parser.add_argument("-m", "--mode", type=int, choices=sorted(reducers),
+                        help="first reduce candidates to what this hashcat mode consumes")
+    parser.add_argument("-c", "--capacity", type=int, default=2000000, help="distinct candidates per filter generation")
+    parser.add_argument("-e", "--error-rate", type=float, default=1e-4, help="chance of dropping a new candidate")
+    parser.add_argument("--stats", help="write candidate and duplicate counts as json to this file")
+    args=parser.parse_args()
+
+    stats = {'total': 0, 'removed': 0}
+    candidates = (line.rstrip(b"\r\n") for line in sys.stdin.buffer)
+    if args.mode is not None:
+        # mapped first, so candidates the mode cannot tell apart collapse
+        candidates = mapCandidates(candidates, args.mode)
+    bloom = RotatingBloomFilter(args.capacity, args.error_rate)
+    out = sys.stdout.buffer
+    try:
+        for candidate in dedupe(candidates, bloom, stats):
+            out.write(candidate + b"\n")
+        out.flush()
+    except BrokenPipeError:
+        # hashcat quits early once every hash is cracked
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+    stats['fraction'] = stats['removed'] / stats['total'] if stats['total'] else 0.0
+    if args.stats:
+        with open(args.stats, "w+") as handle:
+            json.dump(stats, handle)
+    else:
+        print(f"[+] Removed {stats['removed']} of {stats['total']} candidates ({stats['fraction']:.1%}) as duplicates",
+              file=sys.stderr)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+from collections import namedtuple
+from identifier import hints
+
+Credential = namedtuple('Credential', ['identity', 'hash', 'hint'])
+
+# LM/NT of the empty password, pwdump fills unused columns with these
+emptyLM = 'aad3b435b51404eeaad3b435b51404ee'
+emptyNT = '31d6cfe0d16ae931b73c59d7e0c089c0'
+
+# pwdump/fgdump write NO PASSWORD***... or ***... into empty columns
+placeholder = r'(?:[a-f0-9]{32}|NO PASSWORD\*+|\*+)'
+pwdumpLine = re.compile(rf'^[^:]*:\d+:{placeholder}:{placeholder}:', re.IGNORECASE)
+shadowLine = re.compile(r'^[^:]+:[^:]*:\d*:\d*:\d*:\d*:\d*:\d*:[^:]*$')
+bareHash = re.compile(r'^[a-f0-9]{16,}$', re.IGNORECASE)
+
+
+def isPlaceholder(column):
+    return column.startswith("*") or column.upper().startswith("NO PASSWORD")
+
+
+def parsePwdump(line):
+    # user:rid:lm:nt::: as written by pwdump and secretsdump
+    fields = line.split(":")
+    if len(fields) < 4:
+        return
+    user, lm, nt = fields[0], fields[2], fields[3]
+    if lm and lm.lower() != emptyLM and not isPlaceholder(lm):
+        yield Credential(user, lm, 'lm')
+    if nt and nt.lower() != emptyNT and not isPlaceholder(nt):
+        yield Credential(user, nt, 'nt')
+
+
+def parseShadow(line):
+    # user:hash:lastchg:min:max:warn:inactive:expire:reserved
+    fields = line.split(":")
+    if len(fields) < 2:
+        return
+    user, phash = fields[0], fields[1].lstrip("!")
+    # *, x and a bare ! mean no password or a password kept elsewhere
+    if phash in ("", "*", "x"):
+        return
+    yield Credential(user, phash, 'shadow')
+
+
+def parseUsername(line):
+    # user:hash, the layout hashcat reads with --username. Only the first
+    # ':' separates the two since salted hashes use it as well.
+    user, sep, phash = line.partition(":")
+    if sep and phash:
+        yield Credential(user, phash, None)
+
+
+def parseBare(line):
+    yield Credential("", line, None)
+
+
+formats = {
+    'pwdump': parsePwdump,
+    'shadow': parseShadow,
+    'user': parseUsername,
+    'username': parseUsername,
+    'bare': parseBare,
+}
+
+
+def detectFormat(line):
+    if pwdumpLine.match(line):
+        return 'pwdump'
+    if shadowLine.match(line):
+        return 'shadow'
+    head, sep, _ = line.partition(":")
+    # a leading digest means a salted hash rather than a username
+    if sep and not bareHash.match(head):
+        return 'username'
+    return 'bare'
+
+
+def readDump(path, fmt=None):
+    """
+    Yields a Credential for every hash in a credential dump one line at a
+    time, so memory use does not grow with the size of the dump. The
+    format is guessed from the first record unless given.
+    """
+    handle = sys.stdin if path == "-" else open(path, "r", errors="replace")
+    try:
+        parse = formats[fmt] if fmt else None
+        for line in handle:
+            line = line.rstrip("\r\n")
+            if not line or line.startswith("#"):
+                continue
+            if parse is None:
+                parse = formats[detectFormat(line)]
+            yield from parse(line)
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def batchByMode(credentials, hashid, batchDir, limit=None):
+    """
+    Writes every credential into one hash file per candidate hashcat mode,
+    as identity:hash lines for hashcat --username. Returns the modes as
+    (mode, name, hashfile, count) with the modes most hashes rank first at
+    the front.
+    """
+    os.makedirs(batchDir, exist_ok=True)
+    handles = {}
+    batches = {}
+    try:
+        for credential in credentials:
+            modes = hashid.identifyHash(credential.hash, shouldPrint=False, hint=credential.hint)
+            # the column a hash came from settles the mode when it fits
+            hinted = {name: mode for name, mode in modes.items() if mode in hints.get(credential.hint, ())}
+            if hinted:
+                modes = hinted
+            seen = set()
+            for name, mode in modes.items():
+                # several names share a mode, the hash only needs it once
+                if mode in seen:
+                    continue
+                if mode not in handles:
+                    hashfile = os.path.join(batchDir, f"{mode}.txt")
+                    handles[mode] = open(hashfile, "w+")
+                    batches[mode] = [name, hashfile, 0, 0]
+                handles[mode].write(f"{credential.identity}:{credential.hash}\n")
+                batches[mode][2] += 1
+                if not seen:
+                    batches[mode][3] += 1
+                seen.add(mode)
+                if limit and len(seen) >= limit:
+                    break
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    order = sorted(batches.items(), key=lambda item: (-item[1][3], -item[1][2]))
+    return [(mode, name, hashfile, count) for mode, (name, hashfile, count, _) in order]
+
+
+def hashColons(hashfile):
+    """
+    Number of ':' inside the hashes of a batch file (1 for hash:salt),
+    which is the same for every hash of a mode, so the first one tells.
+    """
+    with open(hashfile, "r", errors="replace") as handle:
+        line = handle.readline()
+    _, _, phash = line.rstrip("\r\n").partition(":")
+    return phash.count(":")
+
+
+if __name__=="__main__":
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description="Extract hashes from credential dumps")
+    parser.add_argument("dump", help="dump file, - for stdin")
+    parser.add_argument("-f", "--format", choices=sorted(formats), help="dump format, guessed when omitted")
+    args=parser.parse_args()
+    for credential in readDump(args.dump, args.format):
+        print(f"{credential.identity}:{credential.hash}")
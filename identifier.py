@@ -16,6 +16,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import io
 import re
+import json
+import math
 from collections import namedtuple
 from argparse import ArgumentParser
 
@@ -733,30 +735,96 @@ prototypes = [
 ]
 
 
+# Modes that show up most often in the wild, tried ahead of the rest of
+# their prototype when nothing else tells them apart.
+common = {0: 3, 100: 3, 1000: 3, 1400: 2, 1700: 2, 500: 2, 1800: 2, 3200: 2,
+          7400: 2, 300: 2, 3000: 1, 900: 1, 1500: 1, 5600: 1, 5500: 1}
+
+# Source-format hints (see dumps.py) and the modes they point to
+hints = {
+    'lm': {3000},
+    'nt': {1000},
+    'shadow': {500, 1500, 1800, 3200, 7400},
+}
+
+hexDigest = re.compile(r'^[a-f0-9]+$', re.IGNORECASE)
+
+
+def loadHistory(path):
+    # {hashcat mode: number of past cracks}, as written by saveHistory
+    try:
+        with open(path, "r") as handle:
+            return {int(mode): count for mode, count in json.load(handle).items()}
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def saveHistory(path, history):
+    with open(path, "w+") as handle:
+        json.dump({str(mode): count for mode, count in history.items()}, handle, indent=1)
+
+
 class HashID(object):
 
-    def __init__(self, prototypes=prototypes):
+    def __init__(self, prototypes=prototypes, history=None):
         super(HashID, self).__init__()
         self.prototypes = list(prototypes)
+        self.history = history if history is not None else {}
+
+    def scoreMode(self, phash, prototype, mode, hint=None):
+        score = common.get(mode.hashcat, 0)
+        if mode.extended:
+            score -= 2
 
-    def identifyHash(self, phash, shouldPrint=True):
+        digest, sep, salt = phash.partition(":")
+        takesSalt = "$salt" in mode.name or "$username" in mode.name
+        if not sep and takesSalt:
+            # nothing to feed the salt with, hashcat will reject the line
+            score -= 10
+        elif sep and hexDigest.match(digest) and prototype.regex.match(digest):
+            # the salt is optional for this prototype, so modes that do not
+            # take one are not what produced it
+            score += 3 if takesSalt else -5
+
+        if hexDigest.match(digest):
+            if digest.isupper() and mode.hashcat in (hints['lm'] | hints['nt']):
+                # Windows tooling prints LM/NT digests in upper case
+                score += 2
+            elif not digest.islower() and not digest.isdigit():
+                # mixed case hex is usually a hand-edited digest
+                score -= 1
+
+        if hint in hints:
+            score += 10 if mode.hashcat in hints[hint] else -3
+
+        count = self.history.get(mode.hashcat, 0)
+        if count:
+            score += math.log2(1 + count)
+        return score
+
+    def identifyHash(self, phash, shouldPrint=True, hint=None):
         phash = phash.strip()
-        count = 0
-        hashTypes = ""
-        modes = {}
+        candidates = []
         for prototype in self.prototypes:
             if prototype.regex.match(phash):
                 for mode in prototype.modes:
                     if mode.hashcat is not None:
-                        count += 1
-                        modes[mode.name] = mode.hashcat
-                        if shouldPrint:
-                            hashTypes += f"[+] {mode.name} "
-                            hashTypes += f"[Hashcat Mode: {mode.hashcat}]"
-                            hashTypes += "\n"
+                        candidates.append((self.scoreMode(phash, prototype, mode, hint), mode))
+
+        # sorted() is stable so equally scored modes keep table order
+        candidates = sorted(candidates, key=lambda candidate: -candidate[0])
+        count = len(candidates)
+        hashTypes = ""
+        modes = {}
+        for score, mode in candidates:
+            modes.setdefault(mode.name, mode.hashcat)
+            if shouldPrint:
+                hashTypes += f"[+] {mode.name} "
+                hashTypes += f"[Hashcat Mode: {mode.hashcat}]"
+                hashTypes += "\n"
         if count == 0 and shouldPrint:
             print("[+] Unknown hash")
-        else:
+        elif shouldPrint:
             print("\nDetected hash to be one of the following,")
             print(hashTypes)
 
@@ -765,6 +833,8 @@ class HashID(object):
 if __name__=="__main__":
     parser = ArgumentParser(description="Identify hashes!")
     parser.add_argument("-s", "--string", required=True, help="hash to identigy")
+    parser.add_argument("--hint", choices=sorted(hints), help="where the hash came from")
+    parser.add_argument("--history", help="json file of past cracks per hashcat mode")
     args=parser.parse_args()
-    hashid = HashID()
-    hashid.identifyHash(args.string)
+    hashid = HashID(history=loadHistory(args.history) if args.history else None)
+    hashid.identifyHash(args.string, hint=args.hint)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import os
+import heapq
+from collections import Counter
+
+from wordlists import openWordlist
+
+
+def readFrequency(path, limit):
+    """
+    Words from a frequency list, most frequent first. Accepts `uniq -c`
+    style "count word" lines, "word<TAB>count" lines or bare words that are
+    already in rank order.
+    """
+    def ranked(handle):
+        for rank, line in enumerate(handle):
+            line = line.rstrip(b"\r\n")
+            if b"\t" in line:
+                word, _, count = line.rpartition(b"\t")
+            else:
+                count, _, word = line.strip().partition(b" ")
+                # a bare ranked word may be all digits (123456), it is only
+                # a count when a word follows it
+                if not (count.isdigit() and word):
+                    word, count = line, b""
+            # unranked lines keep their place in the file
+            yield (-int(count) if count.isdigit() else rank, rank, word)
+
+    # only the best limit entries are ever held in memory
+    with openWordlist(path) as handle:
+        return [word for _, _, word in heapq.nsmallest(limit, ranked(handle))]
+
+
+class Reorderer(object):
+    """
+    Keeps a short "head" wordlist of likely candidates that is tried before
+    the full wordlist: every plaintext recovered so far, most cracked first,
+    followed by the top of an optional frequency list. Recovered plaintexts
+    are appended to a store as they arrive and the head is rebuilt only
+    when the store has changed, so the big wordlist is never rewritten.
+    """
+
+    def __init__(self, proj_dir, frequency=None, limit=100000):
+        super(Reorderer, self).__init__()
+        self.recoveredfile = os.path.join(proj_dir, "recovered.txt")
+        self.headfile = os.path.join(proj_dir, "cache", "head.txt")
+        self.frequency = frequency
+        self.limit = limit
+
+    def add(self, plain):
+        with open(self.recoveredfile, "ab") as handle:
+            handle.write(plain.encode("utf-8", "replace") + b"\n")
+
+    def stale(self):
+        if not os.path.exists(self.headfile):
+            return True
+        built = os.stat(self.headfile).st_mtime
+        for source in (self.recoveredfile, self.frequency):
+            if source and os.path.exists(source) and os.stat(source).st_mtime > built:
+                return True
+        return False
+
+    def head(self):
+        """
+        Path of the head wordlist, rebuilt if new cracks came in, or None
+        when there is nothing to put in front of the wordlist yet.
+        """
+        if self.stale():
+            self.build()
+        return self.headfile if os.path.getsize(self.headfile) else None
+
+    def build(self):
+        counts = Counter()
+        if os.path.exists(self.recoveredfile):
+            with open(self.recoveredfile, "rb") as handle:
+                for line in handle:
+                    counts[line.rstrip(b"\r\n")] += 1
+        # most_common keeps first-seen order between equal counts
+        words = [word for word, _ in counts.most_common(self.limit)]
+        if self.frequency and len(words) < self.limit:
+            words += readFrequency(self.frequency, self.limit)
+
+        os.makedirs(os.path.dirname(self.headfile), exist_ok=True)
+        tmp = self.headfile + ".tmp"
+        seen = set()
+        with open(tmp, "wb") as handle:
+            for word in words:
+                if word and word not in seen and len(seen) < self.limit:
+                    seen.add(word)
+                    handle.write(word + b"\n")
+        os.replace(tmp, self.headfile)
+
+
+if __name__=="__main__":
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description="Build the wordlist of likely candidates tried first")
+    parser.add_argument("-d", "--dir", default=".", help="directory holding recovered.txt")
+    parser.add_argument("-f", "--frequency", help="frequency list to rank candidates by")
+    parser.add_argument("-l", "--limit", type=int, default=100000, help="candidates to keep")
+    args=parser.parse_args()
+    reorderer = Reorderer(args.dir, args.frequency, args.limit)
+    reorderer.build()
+    print(reorderer.headfile)
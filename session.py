@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+import os
+import json
+import struct
+
+
+class Session(object):
+    """
+    A named attack that survives crashes. Everything lives in
+    sessions/<name>/: plan.json with the target and the state of every
+    stage (one hashcat mode each), the hash files, the outfile, the head
+    wordlists and dedupe stats of its stages and the hashcat restore files
+    of interrupted stages.
+    """
+
+    def __init__(self, name, sessionsDir):
+        super(Session, self).__init__()
+        self.name = name
+        self.dir = os.path.join(sessionsDir, name)
+        self.planfile = os.path.join(self.dir, "plan.json")
+        self.hashfile = os.path.join(self.dir, "hash.txt")
+        self.crackedfile = os.path.join(self.dir, "cracked_hashes.txt")
+        self.batchdir = os.path.join(self.dir, "batches")
+        self.statsfile = os.path.join(self.dir, "dedupe.json")
+        self.plan = None
+
+    def exists(self):
+        return os.path.exists(self.planfile)
+
+    def load(self):
+        with open(self.planfile, "r") as handle:
+            self.plan = json.load(handle)
+        return self.plan
+
+    def create(self, target, dumpFormat, rules, stages):
+        os.makedirs(self.dir, exist_ok=True)
+        self.plan = {
+            'target': target,
+            'format': dumpFormat,
+            'rules': rules,
+            'stages': [{'mode': hashmode, 'name': mode, 'hashfile': hashfile, 'count': count, 'state': 'pending'}
+                       for hashmode, mode, hashfile, count in stages],
+        }
+        self.save()
+
+    def save(self):
+        # write then rename so a crash never leaves a torn plan behind
+        tmp = self.planfile + ".tmp"
+        with open(tmp, "w+") as handle:
+            json.dump(self.plan, handle, indent=1)
+        os.replace(tmp, self.planfile)
+
+    def mark(self, stage, state):
+        # pending => running => done | cracked, or pending => skipped
+        stage['state'] = state
+        self.save()
+
+    def pending(self):
+        # interrupted stages first, they have a checkpoint to continue from
+        stages = [stage for stage in self.plan['stages'] if stage['state'] in ('pending', 'running')]
+        return sorted(stages, key=lambda stage: stage['state'] != 'running')
+
+    def hashcatSession(self, stage):
+        return f"{self.name}-{stage['mode']}"
+
+    def restorefile(self, stage):
+        return os.path.join(self.dir, f"{stage['mode']}.restore")
+
+    def sessionFlags(self, stage):
+        return f'--session "{self.hashcatSession(stage)}" --restore-file-path "{self.restorefile(stage)}" '
+
+    def headfile(self, stage):
+        # the shared head list is rebuilt as cracks come in, a stage keeps
+        # the one it started with so a restore sees the same candidates
+        return os.path.join(self.dir, f"head.{stage['mode']}.txt")
+
+    def wordsDone(self, stage):
+        # words_cur of hashcat's restore_data_t: int version, char cwd[256],
+        # u32 dicts_pos, u32 masks_pos, then the u64 at offset 272
+        try:
+            with open(self.restorefile(stage), "rb") as handle:
+                data = handle.read(280)
+        except FileNotFoundError:
+            return 0
+        return struct.unpack_from("<Q", data, 272)[0] if len(data) == 280 else 0
+
+    def restoreCommand(self, stage):
+        """
+        Command that continues an interrupted stage from its last checkpoint,
+        or None if it has nothing to continue from. hashcat keeps the
+        original command line in the restore file, but cannot seek in a
+        stage fed through stdin: there the feed is run again and the words
+        hashcat already went through are dropped before they reach it.
+        """
+        if stage['state'] != 'running':
+            return None
+        if not stage.get('feed'):
+            if not os.path.exists(self.restorefile(stage)):
+                return None
+            return f'hashcat {self.sessionFlags(stage)}--restore'
+
+        if os.path.exists(self.restorefile(stage)):
+            # the new run counts from the first word it is given, so the
+            # words done so far are added up in the plan
+            stage['skip'] = stage.get('skip', 0) + self.wordsDone(stage)
+            self.save()
+            os.remove(self.restorefile(stage))
+        if not stage.get('skip'):
+            return None
+        return f"{stage['feed']} | tail -n +{stage['skip'] + 1} | {stage['command']}"
+
+
+if __name__=="__main__":
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description="Show the state of a cracker session")
+    parser.add_argument("name")
+    parser.add_argument("-d", "--sessions-dir", default="sessions")
+    args=parser.parse_args()
+    session = Session(args.name, args.sessions_dir)
+    plan = session.load()
+    print(f"Target: {plan['target']}")
+    for stage in plan['stages']:
+        print(f"[{stage['state']}] {stage['name']} [Hashcat Mode: {stage['mode']}]")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+import os
+import time
+import threading
+from binascii import unhexlify
+
+
+def decodePlain(plain):
+    # hashcat writes plains with unprintable bytes as $HEX[...]
+    if plain.startswith("$HEX[") and plain.endswith("]"):
+        try:
+            return unhexlify(plain[5:-1]).decode("utf-8", "replace")
+        except ValueError:
+            return plain
+    return plain
+
+
+def splitCrack(line, colons=0):
+    # Both hashes (salted modes) and plains may contain ':'. Every hash of
+    # a mode has the same number of them, so the plain starts after the
+    # colon that follows them.
+    end = -1
+    for _ in range(colons + 1):
+        end = line.find(":", end + 1)
+        if end == -1:
+            return None
+    return line[:end], decodePlain(line[end+1:])
+
+
+class OutfileWatcher(object):
+    """
+    Tails a hashcat outfile (-o) while hashcat runs and calls
+    onCrack(hash, plain) for every new line as soon as it is complete.
+    colons is the number of ':' inside the hashes cracked (hash:salt).
+    """
+
+    def __init__(self, outfile, onCrack, colons=0, interval=0.5):
+        super(OutfileWatcher, self).__init__()
+        self.outfile = outfile
+        self.onCrack = onCrack
+        self.colons = colons
+        self.interval = interval
+        self.cracked = []
+        self._offset = 0
+        self._inode = None
+        self._partial = b""
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        # Only lines written from now on are new, anything already in the
+        # outfile belongs to an earlier run.
+        self._rewind(skipExisting=True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        # hashcat has exited by now, so a final read picks up the tail
+        self.poll(final=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def _rewind(self, skipExisting=False):
+        try:
+            st = os.stat(self.outfile)
+        except FileNotFoundError:
+            self._inode, self._offset = None, 0
+            return
+        self._inode = st.st_ino
+        self._offset = st.st_size if skipExisting else 0
+        self._partial = b""
+
+    def poll(self, final=False):
+        try:
+            st = os.stat(self.outfile)
+        except FileNotFoundError:
+            return
+        # Replaced or truncated outfile, start reading from the top again
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            self._rewind()
+        if st.st_size == self._offset:
+            return
+        with open(self.outfile, "rb") as handle:
+            handle.seek(self._offset)
+            data = handle.read()
+        self._offset += len(data)
+        data = self._partial + data
+        lines = data.split(b"\n")
+        # the last element is an incomplete line unless hashcat has exited
+        self._partial = b"" if final else lines.pop()
+        for line in lines:
+            line = line.rstrip(b"\r").decode("utf-8", "replace")
+            if not line:
+                continue
+            result = splitCrack(line, self.colons)
+            if result is None:
+                continue
+            self.cracked.append(result)
+            self.onCrack(*result)
+
+
+if __name__=="__main__":
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description="Print cracks from a hashcat outfile as they arrive")
+    parser.add_argument("outfile", help="file passed to hashcat with -o")
+    parser.add_argument("-c", "--colons", type=int, default=0, help="number of ':' inside the hashes (hash:salt is 1)")
+    args=parser.parse_args()
+    watcher = OutfileWatcher(args.outfile, lambda h, p: print(f'{h}:\033[31m{p}\033[0m'), args.colons)
+    watcher._rewind()
+    try:
+        while True:
+            watcher.poll()
+            time.sleep(watcher.interval)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+import os
+import io
+import sys
+import gzip
+import lzma
+import queue
+import threading
+import subprocess
+from shutil import which
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+magics = {
+    b'\x1f\x8b': 'gz',
+    b'\xfd7zXZ\x00': 'xz',
+    b'\x28\xb5\x2f\xfd': 'zst',
+}
+
+# Looked for next to cracker.py, in this order
+names = ["wordlist.txt", "wordlist.txt.gz", "wordlist.txt.xz", "wordlist.txt.zst"]
+
+
+def findWordlist(proj_dir):
+    for name in names:
+        path = os.path.join(proj_dir, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def compression(path):
+    # Sniff the header rather than trust the name, the crackstation
+    # download used to be saved as a gzip named wordlist.txt.
+    with open(path, "rb") as handle:
+        head = handle.read(6)
+    for magic, kind in magics.items():
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+def decompressCommand(path):
+    """
+    Command line of an external decompressor writing path to stdout, the
+    multi-threaded ones where installed, or None when nothing fits.
+    """
+    kind = compression(path)
+    if kind == 'gz':
+        if which("pigz"):
+            return ["pigz", "-dc", path]
+        if which("gzip"):
+            return ["gzip", "-dc", path]
+    elif kind == 'xz' and which("xz"):
+        return ["xz", "-dc", "-T0", path]
+    elif kind == 'zst' and which("zstd"):
+        return ["zstd", "-dc", "-T0", path]
+    return None
+
+
+def openWordlist(path):
+    """
+    Opens a wordlist for reading bytes whether it is plain, .gz, .xz or
+    .zst, decompressing on the fly.
+    """
+    kind = compression(path)
+    if kind is None:
+        return open(path, "rb")
+    if kind == 'gz':
+        return gzip.open(path, "rb")
+    if kind == 'xz':
+        return lzma.open(path, "rb")
+    if zstandard is not None:
+        # stream_reader cannot be iterated line by line on its own
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+    command = decompressCommand(path)
+    if command is None:
+        raise RuntimeError(f"{path} is zstd compressed, install zstd or the zstandard module")
+    return ProcessReader(subprocess.Popen(command, stdout=subprocess.PIPE))
+
+
+class ProcessReader(io.BufferedReader):
+    # stdout of a decompressor process, reaped when the reader is closed
+
+    def __init__(self, proc):
+        super(ProcessReader, self).__init__(proc.stdout)
+        self.proc = proc
+
+    def close(self):
+        if self.closed:
+            return
+        super(ProcessReader, self).close()
+        # closing the pipe early stops the decompressor with SIGPIPE
+        self.proc.wait()
+
+
+def stream(path, out, chunkSize=1 << 20, buffers=16):
+    """
+    Copies the decompressed wordlist to out. A worker thread decompresses
+    up to buffers chunks ahead of the writer so decompression overlaps
+    with whatever consumes out, without unbounded read-ahead.
+    """
+    chunks = queue.Queue(maxsize=buffers)
+    failure = []
+
+    def decompress():
+        try:
+            with openWordlist(path) as handle:
+                while True:
+                    chunk = handle.read(chunkSize)
+                    if not chunk:
+                        break
+                    chunks.put(chunk)
+        except Exception as error:
+            failure.append(error)
+        finally:
+            chunks.put(None)
+
+    worker = threading.Thread(target=decompress, daemon=True)
+    worker.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            out.write(chunk)
+        out.flush()
+    except BrokenPipeError:
+        # hashcat quits early once every hash is cracked
+        pass
+    if failure:
+        raise failure[0]
+
+
+def feedCommand(path):
+    """
+    Shell command that writes the decompressed wordlist to stdout, for
+    piping into hashcat, or None if path is not compressed and can be
+    handed to hashcat as is. The decompressor runs as its own process so
+    it works alongside hashcat, with the pipe bounding what is buffered.
+    """
+    if compression(path) is None:
+        return None
+    command = decompressCommand(path)
+    if command is None:
+        command = [sys.executable, os.path.abspath(__file__), path]
+    return " ".join(f'"{arg}"' for arg in command)
+
+
+if __name__=="__main__":
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description="Write a (compressed) wordlist to stdout")
+    parser.add_argument("wordlist")
+    args=parser.parse_args()
+    stream(args.wordlist, sys.stdout.buffer)
+    # whatever is left unflushed after a broken pipe has nowhere to go
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())